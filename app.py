@@ -28,24 +28,68 @@ You are a helpful assistant a developer working at a small financial institution
 """.strip()
 # =====================
 
-# Build the system prompt with global context merged in one system message (so pruning keeps it)
-base_system_prompt = "You are a helpful assistant."
-if GLOBAL_CONTEXT:
-    base_system_prompt += f"\n\nContext to follow for every response:\n{GLOBAL_CONTEXT}"
+# Static system prompt; global context is sent separately after the history
+STATIC_SYSTEM = "You are a helpful assistant."
 
-# Initialize conversation history with a system prompt that includes the global context
-messages = [
-    {"role": "system", "content": base_system_prompt}
-]
+# Global context goes in its own trailing message, after the history
+CONTEXT_MESSAGE = {"role": "system", "content": f"Context to follow for every response:\n{GLOBAL_CONTEXT}"} if GLOBAL_CONTEXT else None
 
-# Keep the conversation within reasonable length to avoid context limit issues
+# Append-only conversation history (user/assistant turns only)
+history = []
+
+# Summaries of evicted turns, kept right after the system prompt
+summaries = []
+
+# Prompt used to fold evicted turns into a summary message
+SUMMARY_PROMPT = "Summarize the conversation below in a few sentences. Keep facts, decisions, and open questions the assistant will need later."
+# Past this many summaries, they are folded into a single one to bound the prefix
+MAX_SUMMARIES = 4
+
+# Build messages with a stable prefix: system, summaries, history, context, newest user turn
+def build_messages():
+    messages = [{"role": "system", "content": STATIC_SYSTEM}, *summaries, *history[:-1]]
+    if CONTEXT_MESSAGE:
+        messages.append(CONTEXT_MESSAGE)
+    messages.extend(history[-1:])
+    return messages
+
+# Helper to summarize old turns with one cheap call
+def summarize_turns(turns):
+    transcript = "\n".join(f"{t['role']}: {t['content']}" for t in turns)
+    resp = client.chat.completions.create(
+        model=deployment,
+        messages=[
+            {"role": "system", "content": SUMMARY_PROMPT},
+            {"role": "user", "content": transcript},
+        ],
+        temperature=0,
+        max_tokens=200,
+    )
+    return resp.choices[0].message.content or ""
+
+# Keep the conversation within reasonable length by folding the oldest half into a summary
 def prune_messages(history, max_pairs=20):
-    # Keep system + last N user/assistant pairs
-    if not history:
+    if len(history) <= 2 * max_pairs:
         return history
-    system = history[:1] if history[0].get("role") == "system" else []
-    tail = history[-(2 * max_pairs):]
-    return system + tail
+    keep = 2 * max(1, max_pairs // 2)
+    try:
+        summary = summarize_turns(history[:-keep])
+    except Exception as e:
+        print(f"Could not summarize older turns; dropping them instead: {e}")
+        summary = ""
+    if summary:
+        summaries.append({"role": "assistant", "content": f"Summary of earlier conversation:\n{summary}"})
+    # Rarely, merge the summaries into one (a deliberate prefix shift) to bound their size
+    if len(summaries) > MAX_SUMMARIES:
+        try:
+            merged = summarize_turns(summaries)
+        except Exception:
+            merged = ""
+        if merged:
+            summaries[:] = [{"role": "assistant", "content": f"Summary of earlier conversation:\n{merged}"}]
+        else:
+            del summaries[:-MAX_SUMMARIES]
+    return history[-keep:]
 
 print("Type 'exit' to quit.")
 while True:
@@ -53,19 +97,19 @@ while True:
     if user_input.lower() in ("exit", "quit", "q"):
         break
 
-    messages.append({"role": "user", "content": user_input})
+    history.append({"role": "user", "content": user_input})
 
     try:
         resp = client.chat.completions.create(
             model=deployment,
-            messages=messages,
+            messages=build_messages(),
             temperature=0.7,
             max_tokens=500,
         )
         assistant_reply = resp.choices[0].message.content
         print(f"Assistant: {assistant_reply}\n")
 
-        messages.append({"role": "assistant", "content": assistant_reply})
-        messages = prune_messages(messages, max_pairs=20)
+        history.append({"role": "assistant", "content": assistant_reply})
+        history = prune_messages(history, max_pairs=20)
     except Exception as e:
         print(f"Error: {e}")
\ No newline at end of file
@@ -1,23 +1,80 @@
 import os
+import re
+import asyncio
+import queue
+import threading
 from dotenv import load_dotenv
+from video_jobs import VideoJobError, run_video_job
 import streamlit as st
-from openai import AzureOpenAI
+from openai import AzureOpenAI, AsyncAzureOpenAI, DefaultAioHttpClient
+import httpx
+import numpy as np
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import time
+from collections import deque
+from itertools import islice
+from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urlparse, urlunparse, parse_qs, urlencode
 
-# Load environment variables
-load_dotenv()
-
-# Read Azure OpenAI settings from environment
-AZURE_OPENAI_API_KEY = os.getenv("AZURE_OPENAI_API_KEY")
-AZURE_OPENAI_API_VERSION = os.getenv("AZURE_OPENAI_API_VERSION")
-AZURE_OPENAI_ENDPOINT = os.getenv("AZURE_OPENAI_ENDPOINT", "").strip()
-DEFAULT_DEPLOYMENT = os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME", "")
-DEFAULT_VIDEO_API_VERSION = os.getenv("AZURE_OPENAI_VIDEO_API_VERSION", "preview")
-
-# If endpoint points to video jobs API, disable chat UI (SDK would fail on that URL)
-DISABLE_CHAT = "/video/generations/jobs" in (AZURE_OPENAI_ENDPOINT or "")
+# Load environment variables once per server process, not on every rerun
+@st.cache_resource(show_spinner=False)
+def _load_env_once() -> bool:
+    load_dotenv()
+    return True
+
+_load_env_once()
+
+# Matches endpoints that already point at the video jobs API
+VIDEO_JOBS_PATH = re.compile(r"/video/generations/jobs")
+
+# Azure OpenAI settings, read from the environment once per server process
+@dataclass(frozen=True)
+class Config:
+    api_key: str
+    api_version: str
+    endpoint: str
+    default_deployment: str
+    default_video_deployment: str
+    video_api_version: str
+    embedding_deployment: str
+    # If endpoint points to video jobs API, disable chat UI (SDK would fail on that URL)
+    disable_chat: bool
+    # All settings required for the API calls are present
+    env_ok: bool
+
+@st.cache_resource(show_spinner=False)
+def load_config() -> Config:
+    api_key = os.getenv("AZURE_OPENAI_API_KEY", "")
+    api_version = os.getenv("AZURE_OPENAI_API_VERSION", "")
+    endpoint = os.getenv("AZURE_OPENAI_ENDPOINT", "").strip()
+    return Config(
+        api_key=api_key,
+        api_version=api_version,
+        endpoint=endpoint,
+        default_deployment=os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME", ""),
+        default_video_deployment=os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME", "sora"),
+        video_api_version=os.getenv("AZURE_OPENAI_VIDEO_API_VERSION", "preview"),
+        embedding_deployment=os.getenv("AZURE_OPENAI_EMBEDDING_DEPLOYMENT_NAME", ""),
+        disable_chat=bool(VIDEO_JOBS_PATH.search(endpoint)),
+        env_ok=all([api_key, api_version, endpoint]),
+    )
+
+cfg = load_config()
+
+# Static system prompt; dynamic context is sent separately after the history
+STATIC_SYSTEM = "You are a helpful assistant."
+
+# Prompt used to fold evicted turns into a summary message
+SUMMARY_PROMPT = "Summarize the conversation below in a few sentences. Keep facts, decisions, and open questions the assistant will need later."
+# Past this many summaries, they are folded into a single one to bound the prefix
+MAX_SUMMARIES = 4
+
+# Semantic cache: reuse a reply when a new message is this similar (cosine) to a cached one
+SEM_CACHE_THRESHOLD = 0.92
+SEM_CACHE_SIZE = 50
 
 # Helper: build jobs URL with a specific api-version
 def build_jobs_url_with_version(endpoint: str, api_version: str) -> str:
@@ -28,7 +85,7 @@ def build_jobs_url_with_version(endpoint: str, api_version: str) -> str:
     query = parse_qs(parsed.query)
     query["api-version"] = [api_version]
 
-    if "/video/generations/jobs" in path:
+    if VIDEO_JOBS_PATH.search(path):
         new_path = path
     else:
         # assume base endpoint; append the jobs path
@@ -36,35 +93,172 @@ def build_jobs_url_with_version(endpoint: str, api_version: str) -> str:
 
     return urlunparse((parsed.scheme, parsed.netloc, new_path, parsed.params, urlencode(query, doseq=True), parsed.fragment))
 
-# Lazy client (only if chat enabled)
-_client = None
-
-def get_client():
-    global _client
-    if _client is None:
-        _client = AzureOpenAI(
-            api_key=AZURE_OPENAI_API_KEY,
-            api_version=AZURE_OPENAI_API_VERSION,
-            azure_endpoint=AZURE_OPENAI_ENDPOINT,
-        )
-    return _client
+# Jobs URL cached by Streamlit, so it persists across reruns and sessions
+@st.cache_data(show_spinner=False)
+def _jobs_url(endpoint: str, api_version: str) -> str:
+    return build_jobs_url_with_version(endpoint, api_version)
+
+# Shared client (only if chat enabled), cached across reruns and sessions so its connection
+# pool stays warm; HTTP/2 multiplexes concurrent sessions' calls over one connection.
+@st.cache_resource
+def get_client(api_key: str, api_version: str, endpoint: str):
+    return AzureOpenAI(
+        api_key=api_key,
+        api_version=api_version,
+        azure_endpoint=endpoint,
+        http_client=httpx.Client(
+            http2=True,
+            limits=httpx.Limits(max_keepalive_connections=20, max_connections=50, keepalive_expiry=30.0),
+        ),
+    )
+
+# Async client for chat streaming, on the SDK's aiohttp transport. aiohttp sessions
+# are bound to one event loop, so the client is only ever used on the loop below.
+@st.cache_resource
+def get_async_client(api_key: str, api_version: str, endpoint: str):
+    return AsyncAzureOpenAI(
+        api_key=api_key,
+        api_version=api_version,
+        azure_endpoint=endpoint,
+        http_client=DefaultAioHttpClient(),
+    )
+
+# Long-lived helper event loop running on a daemon thread (one per server process)
+@st.cache_resource
+def get_event_loop() -> asyncio.AbstractEventLoop:
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, name="aoai-event-loop", daemon=True).start()
+    return loop
+
+# Helper: drain an async generator on the helper loop and yield its items synchronously
+def iter_over_async(agen, loop: asyncio.AbstractEventLoop):
+    q: queue.Queue = queue.Queue()
+    done = object()
+
+    async def drain():
+        try:
+            async for item in agen:
+                q.put(item)
+        finally:
+            q.put(done)
+
+    future = asyncio.run_coroutine_threadsafe(drain(), loop)
+    finished = False
+    try:
+        while True:
+            item = q.get()
+            if item is done:
+                finished = True
+                break
+            yield item
+    finally:
+        # Consumer stopped early (e.g. a rerun during st.write_stream): stop pulling tokens
+        if not finished and not future.done():
+            future.cancel()
+    # Re-raise any error from the stream (e.g. HTTP failures) in the caller's thread
+    future.result()
+
+# Helper: stream reply text deltas from the async client
+async def stream_reply(client, messages, **params):
+    response = await client.chat.completions.create(messages=messages, stream=True, **params)
+    async for chunk in response:
+        # Each chunk contains a delta with partial content
+        try:
+            delta = chunk.choices[0].delta
+            content = getattr(delta, "content", None)
+        except Exception:
+            content = None
+        if content:
+            yield content
+
+# Helper: summarize old turns with one cheap call
+def summarize_turns(client, model: str, turns) -> str:
+    transcript = "\n".join(f"{t['role']}: {t['content']}" for t in turns)
+    resp = client.chat.completions.create(
+        model=model,
+        messages=[
+            {"role": "system", "content": SUMMARY_PROMPT},
+            {"role": "user", "content": transcript},
+        ],
+        temperature=0,
+        max_tokens=200,
+    )
+    return resp.choices[0].message.content or ""
+
+# Helper: run independent (non-streaming) completions concurrently on the async client
+async def complete_many(client, message_lists, **params):
+    return await asyncio.gather(
+        *(client.chat.completions.create(messages=messages, **params) for messages in message_lists),
+        return_exceptions=True,
+    )
+
+# Helper: embed text as a unit-length float32 vector (so dot product == cosine)
+def embed_text(client, model: str, text: str) -> np.ndarray:
+    resp = client.embeddings.create(model=model, input=text)
+    vec = np.asarray(resp.data[0].embedding, dtype=np.float32)
+    return vec / (np.linalg.norm(vec) or 1.0)
+
+# Helper: return the cached reply most similar to vec, if above the threshold.
+# Entries are (vector, reply, last_used); a hit refreshes last_used for LRU eviction.
+def sem_cache_lookup(cache: list, vec: np.ndarray):
+    if not cache:
+        return None
+    sims = np.stack([entry[0] for entry in cache]) @ vec
+    best = int(sims.argmax())
+    if sims[best] < SEM_CACHE_THRESHOLD:
+        return None
+    cached_vec, reply, _ = cache[best]
+    cache[best] = (cached_vec, reply, time.monotonic())
+    return reply
+
+# Helper: add a reply to the cache, evicting the least recently used entry when full
+def sem_cache_store(cache: list, vec: np.ndarray, reply: str):
+    if len(cache) >= SEM_CACHE_SIZE:
+        cache.pop(min(range(len(cache)), key=lambda i: cache[i][2]))
+    cache.append((vec, reply, time.monotonic()))
+
+# Shared HTTP session for the video REST calls so job polling reuses one
+# keep-alive connection instead of a fresh TCP+TLS handshake per request.
+# Retries apply to idempotent methods only (GET), so job creation is never duplicated.
+@st.cache_resource
+def get_http_session() -> requests.Session:
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=10,
+        pool_maxsize=10,
+        max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504]),
+    )
+    session.mount("https://", adapter)
+    session.headers.update({"Accept": "application/json"})
+    return session
 
 # --- UI Config ---
 st.set_page_config(page_title="Azure OpenAI Video Generator", page_icon="🎬", layout="wide")
 
 # Chat UI (optional)
-if not DISABLE_CHAT:
+if not cfg.disable_chat:
     # Sidebar: parameters and actions
     with st.sidebar:
         st.header("Settings")
-        deployment = st.text_input("Deployment name", value=DEFAULT_DEPLOYMENT, help="Your Azure OpenAI deployment (model) name")
+        deployment = st.text_input("Deployment name", value=cfg.default_deployment, help="Your Azure OpenAI deployment (model) name")
         temperature = st.slider("Temperature", min_value=0.0, max_value=1.0, value=0.7, step=0.05)
         top_p = st.slider("Top P", min_value=0.1, max_value=1.0, value=1.0, step=0.05)
         max_tokens = st.number_input("Max tokens", min_value=1, max_value=8192, value=500, step=50)
+        n_variants = st.number_input("Variants", min_value=1, max_value=5, value=1, step=1, help="Generate several candidate replies in one request (disables streaming)")
+        use_sem_cache = st.checkbox(
+            "Semantic cache",
+            value=False,
+            disabled=not cfg.embedding_deployment,
+            help="Answer near-duplicate questions from earlier replies. Requires AZURE_OPENAI_EMBEDDING_DEPLOYMENT_NAME.",
+        )
         keep_last_pairs = st.slider("Keep last N pairs", min_value=2, max_value=50, value=20, step=1, help="Prunes old turns to stay within context limits")
 
         if st.button("Clear chat", type="secondary"):
             st.session_state.pop("history", None)
+            st.session_state.pop("committed_system", None)
+            st.session_state.pop("summaries", None)
+            st.session_state.pop("variants", None)
+            st.session_state.pop("sem_cache", None)
             st.session_state.pop("global_context", None)
             st.rerun()
 
@@ -72,6 +266,10 @@ if not DISABLE_CHAT:
     st.title("💬 Azure OpenAI Chat UI")
     st.caption("Simple, configurable chat interface with streaming and adjustable parameters.")
 
+    # Show warnings raised during the previous turn (its st.rerun() would have wiped them)
+    for notice in st.session_state.pop("notices", []):
+        st.warning(notice)
+
     with st.expander("Global context (applies to every response)", expanded=True):
         default_ctx = (
             st.session_state.get("global_context")
@@ -79,84 +277,214 @@ if not DISABLE_CHAT:
         )
         global_context = st.text_area("Context", value=default_ctx, height=140, placeholder="Add audience, tone, constraints, domain guidance, etc.")
         st.session_state["global_context"] = global_context
+        context_text = global_context.strip()
 
-    # Initialize history (user/assistant turns only)
+    # Initialize history (user/assistant turns only) as a bounded ring buffer
     if "history" not in st.session_state:
-        st.session_state.history = []
-
-    # Helper to build messages with a single system prompt
+        st.session_state.history = deque(maxlen=2 * keep_last_pairs)
+
+    # System message, created once per session so the request prefix stays stable
+    if "committed_system" not in st.session_state:
+        st.session_state.committed_system = {"role": "system", "content": STATIC_SYSTEM}
+    # Summaries of evicted turns, kept right after the system message
+    if "summaries" not in st.session_state:
+        st.session_state.summaries = []
+
+    # Semantic cache entries only hold for the context and deployment they were answered under
+    sem_cache_key = (context_text, deployment)
+    if st.session_state.get("sem_cache_key") != sem_cache_key or "sem_cache" not in st.session_state:
+        st.session_state.sem_cache = []
+        st.session_state.sem_cache_key = sem_cache_key
+
+    # Helper to build the dynamic context message (None when empty). Memoized on the
+    # context text so reruns reuse the same message instead of rebuilding the string.
+    def context_message():
+        key = hash(context_text)
+        cached = st.session_state.get("_ctx_cache")
+        if cached is None or cached[0] != key:
+            msg = {"role": "system", "content": f"Context to follow for every response:\n{context_text}"} if context_text else None
+            cached = st.session_state["_ctx_cache"] = (key, msg)
+        return cached[1]
+
+    # Helper to build messages with a stable prefix: system, summaries, history, context, newest user turn
     def build_messages():
-        base_system = "You are a helpful assistant."
-        if global_context.strip():
-            base_system += f"\n\nContext to follow for every response:\n{global_context.strip()}"
-
-        messages = [{"role": "system", "content": base_system}]
-        messages.extend(st.session_state.history)
+        history = st.session_state.history
+        messages = [st.session_state.committed_system, *st.session_state.summaries]
+        messages.extend(islice(history, max(0, len(history) - 1)))
+        # Edits to the context only change the tail, not the cached prefix
+        ctx = context_message()
+        if ctx:
+            messages.append(ctx)
+        if history:
+            messages.append(history[-1])
         return messages
 
-    # Helper to prune history (keeps only user/assistant turns)
+    # Helper to prune history once the buffer is full, folding the oldest half into a summary
     def prune_history(max_pairs: int):
         turns = st.session_state.history
-        # Keep the last 2 * max_pairs messages
-        st.session_state.history = turns[-(2 * max_pairs):]
-
-    # Display existing chat
+        if len(turns) < 2 * max_pairs:
+            return
+        keep = 2 * max(1, max_pairs // 2)
+        evicted = [turns.popleft() for _ in range(len(turns) - keep)]
+        try:
+            client = get_client(cfg.api_key, cfg.api_version, cfg.endpoint)
+            summary = summarize_turns(client, deployment, evicted)
+        except Exception as e:
+            st.session_state.setdefault("notices", []).append(f"Could not summarize older turns; dropping them instead: {e}")
+            summary = ""
+        if not summary:
+            return
+        summaries = st.session_state.summaries
+        summaries.append({"role": "assistant", "content": f"Summary of earlier conversation:\n{summary}"})
+        # Rarely, merge the summaries into one (a deliberate prefix shift) to bound their size
+        if len(summaries) > MAX_SUMMARIES:
+            try:
+                merged = summarize_turns(client, deployment, summaries)
+            except Exception:
+                merged = ""
+            if merged:
+                st.session_state.summaries = [{"role": "assistant", "content": f"Summary of earlier conversation:\n{merged}"}]
+            else:
+                st.session_state.summaries = summaries[-MAX_SUMMARIES:]
+
+    # Resize the ring buffer when the slider changes, summarizing turns that no longer fit
+    if st.session_state.history.maxlen != 2 * keep_last_pairs:
+        prune_history(keep_last_pairs)
+        st.session_state.history = deque(st.session_state.history, maxlen=2 * keep_last_pairs)
+
+    # Batch eval: independent single-turn prompts, sent concurrently rather than one by one
+    with st.expander("Batch prompts (one per line, no chat history)", expanded=False):
+        batch_text = st.text_area("Prompts", height=120, key="batch_prompts")
+        if st.button("Run batch"):
+            batch_prompts = [line.strip() for line in batch_text.splitlines() if line.strip()]
+            if not cfg.env_ok or not deployment:
+                st.error("Set the Azure OpenAI environment variables and a deployment name first.")
+            elif batch_prompts:
+                prefix = [st.session_state.committed_system]
+                ctx = context_message()
+                if ctx:
+                    prefix.append(ctx)
+                client = get_async_client(cfg.api_key, cfg.api_version, cfg.endpoint)
+                with st.spinner(f"Running {len(batch_prompts)} prompts…"):
+                    results = asyncio.run_coroutine_threadsafe(
+                        complete_many(
+                            client,
+                            [[*prefix, {"role": "user", "content": p}] for p in batch_prompts],
+                            model=deployment,
+                            temperature=float(temperature),
+                            top_p=float(top_p),
+                            max_tokens=int(max_tokens),
+                        ),
+                        get_event_loop(),
+                    ).result()
+                for p, result in zip(batch_prompts, results):
+                    st.markdown(f"**{p}**")
+                    if isinstance(result, Exception):
+                        st.error(f"Error from Azure OpenAI: {result}")
+                    else:
+                        st.markdown(result.choices[0].message.content or "")
+
+    # Display existing chat; the last reply shows all variants if several were requested
+    variants = st.session_state.get("variants")
     for msg in st.session_state.history:
         with st.chat_message(msg["role"]):
-            st.markdown(msg["content"])
+            if variants and variants["message"] is msg:
+                for tab, text in zip(st.tabs([f"Variant {k + 1}" for k in range(len(variants["texts"]))]), variants["texts"]):
+                    with tab:
+                        st.markdown(text)
+            else:
+                st.markdown(msg["content"])
 
     # Chat input
     prompt = st.chat_input("Message the assistant…")
 
-    # Basic validation
-    env_ok = all([AZURE_OPENAI_API_KEY, AZURE_OPENAI_API_VERSION, AZURE_OPENAI_ENDPOINT])
-    if not env_ok:
+    if not cfg.env_ok:
         st.warning("Missing one or more environment variables: AZURE_OPENAI_API_KEY, AZURE_OPENAI_API_VERSION, AZURE_OPENAI_ENDPOINT. Set them in your .env file.")
 
-    if prompt is not None and prompt.strip():
-        if not env_ok:
+    prompt_text = (prompt or "").strip()
+    if prompt_text:
+        if not cfg.env_ok:
             st.stop()
         if not deployment:
             st.error("Please provide a deployment name in Settings.")
             st.stop()
 
         # Append user message to history
-        user_msg = {"role": "user", "content": prompt.strip()}
+        st.session_state.pop("variants", None)
+        user_msg = {"role": "user", "content": prompt_text}
         st.session_state.history.append(user_msg)
         with st.chat_message("user"):
             st.markdown(user_msg["content"])
 
+        # Check the semantic cache before calling the chat API
+        cache_vec = None
+        cached_reply = None
+        if use_sem_cache and int(n_variants) == 1:
+            try:
+                client = get_client(cfg.api_key, cfg.api_version, cfg.endpoint)
+                # Key on the previous reply plus the new message, so short follow-ups
+                # ("why?", "tell me more") only match in the same conversational spot
+                history = st.session_state.history
+                prev_reply = history[-2]["content"] if len(history) >= 2 and history[-2]["role"] == "assistant" else ""
+                cache_text = f"{prev_reply}\n\n{user_msg['content']}" if prev_reply else user_msg["content"]
+                cache_vec = embed_text(client, cfg.embedding_deployment, cache_text)
+                cached_reply = sem_cache_lookup(st.session_state.sem_cache, cache_vec)
+            except Exception as e:
+                st.session_state.setdefault("notices", []).append(f"Semantic cache unavailable: {e}")
+
         # Prepare and stream assistant response
         with st.chat_message("assistant"):
-            placeholder = st.empty()
             full_text = ""
+            texts = []
             try:
-                client = get_client()
-                response = client.chat.completions.create(
-                    model=deployment,
-                    messages=build_messages(),
-                    temperature=float(temperature),
-                    top_p=float(top_p),
-                    max_tokens=int(max_tokens),
-                    stream=True,
-                )
-                for chunk in response:
-                    # Each chunk contains a delta with partial content
-                    try:
-                        delta = chunk.choices[0].delta
-                        content = getattr(delta, "content", None)
-                    except Exception:
-                        content = None
-                    if content:
-                        full_text += content
-                        placeholder.markdown(full_text)
+                if cached_reply is not None:
+                    full_text = cached_reply
+                    st.markdown(full_text)
+                    st.caption("Served from semantic cache")
+                elif int(n_variants) > 1:
+                    # One request with n choices instead of n round trips
+                    with st.spinner("Generating variants…"):
+                        resp = get_client(cfg.api_key, cfg.api_version, cfg.endpoint).chat.completions.create(
+                            model=deployment,
+                            messages=build_messages(),
+                            temperature=float(temperature),
+                            top_p=float(top_p),
+                            max_tokens=int(max_tokens),
+                            n=int(n_variants),
+                        )
+                    texts = [choice.message.content or "" for choice in resp.choices]
+                    full_text = texts[0] if texts else ""
+                else:
+                    client = get_async_client(cfg.api_key, cfg.api_version, cfg.endpoint)
+                    reply = stream_reply(
+                        client,
+                        build_messages(),
+                        model=deployment,
+                        temperature=float(temperature),
+                        top_p=float(top_p),
+                        max_tokens=int(max_tokens),
+                    )
+                    # write_stream renders deltas incrementally instead of redrawing the
+                    # whole reply per token, and returns the concatenated text
+                    full_text = st.write_stream(iter_over_async(reply, get_event_loop()))
             except Exception as e:
                 st.error(f"Error from Azure OpenAI: {e}")
+                # Drop the unanswered user turn so history stays in pairs; otherwise the
+                # ring buffer could fill on a user append and drop a turn unsummarized
+                if st.session_state.history and st.session_state.history[-1] is user_msg:
+                    st.session_state.history.pop()
                 st.stop()
 
+        if cache_vec is not None and cached_reply is None and full_text:
+            sem_cache_store(st.session_state.sem_cache, cache_vec, full_text)
+
         # Save assistant message and prune
-        st.session_state.history.append({"role": "assistant", "content": full_text})
+        assistant_msg = {"role": "assistant", "content": full_text}
+        st.session_state.history.append(assistant_msg)
         prune_history(keep_last_pairs)
+        if len(texts) > 1:
+            # Matched by identity, so evictions from the front can't misplace the tabs
+            st.session_state.variants = {"message": assistant_msg, "texts": texts}
 
         # Rerun to render the updated history cleanly
         st.rerun()
@@ -172,17 +500,17 @@ st.header("🎬 Video Generator")
 st.caption("Generate a single video from your prompt. No data is persisted between sessions.")
 
 # Base endpoint and API version
-st.write("Endpoint (from .env):", AZURE_OPENAI_ENDPOINT or "<not set>")
-video_api_version = st.text_input("Video API version", value=DEFAULT_VIDEO_API_VERSION, help="Example: 2024-12-01-preview or preview (depends on your region/preview)")
+st.write("Endpoint (from .env):", cfg.endpoint or "<not set>")
+video_api_version = st.text_input("Video API version", value=cfg.video_api_version, help="Example: 2024-12-01-preview or preview (depends on your region/preview)")
 
 # Show the computed jobs URL for debugging
-jobs_url_preview = build_jobs_url_with_version(AZURE_OPENAI_ENDPOINT, video_api_version)
+jobs_url_preview = _jobs_url(cfg.endpoint, video_api_version)
 st.write("📍 Jobs URL:", jobs_url_preview or "<will be computed>")
 
 # Video deployment name (e.g., sora)
 video_deployment = st.text_input(
     "Video deployment name",
-    value=os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME", "sora"),
+    value=cfg.default_video_deployment,
     help="Azure OpenAI video model deployment (e.g., sora)",
 )
 
@@ -202,40 +530,56 @@ with col2:
 
 duration_s = st.slider("Duration (seconds)", min_value=1, max_value=60, value=5, step=1)
 
-# Helper to build the status URL from the create URL and job_id
-def build_status_url(create_url: str, job_id: str) -> str:
-    if not create_url:
-        return ""
-    parsed = urlparse(create_url)
-    # Replace trailing /jobs with /jobs/{id}; preserve query
-    path = parsed.path
-    if path.endswith("/jobs"):
-        path = f"{path}/{job_id}"
-    elif "/jobs?" in create_url or path.endswith("/jobs/"):
-        # Fallback if already has query right after jobs
-        path = path.rstrip("/") + f"/{job_id}"
-    # Rebuild URL with same query
-    new_url = urlunparse((parsed.scheme, parsed.netloc, path, parsed.params, parsed.query, parsed.fragment))
-    return new_url
+# Shared worker pool for video jobs, so a job survives reruns of the script
+@st.cache_resource
+def get_executor() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(max_workers=4, thread_name_prefix="video-job")
+
+# Live status of the running job; only this fragment reruns while polling, so the
+# rest of the page stays responsive. Hands back to a full rerun once the job is done.
+@st.fragment(run_every=2)
+def video_job_status():
+    future = st.session_state.get("video_future")
+    if future is None or future.done():
+        st.rerun()
+    progress = st.session_state.video_progress
+    st.status(progress.get("stage", "Working…"), expanded=False, state="running")
+    if progress.get("total"):
+        st.progress(min(1.0, progress.get("done", 0) / progress["total"]), text="Downloading video…")
+
+if "video_future" not in st.session_state:
+    st.session_state.video_future = None
+
+# Collect a finished job. The result is rendered in this run only and not kept in
+# session state, so the MP4 isn't held (and re-sent) on every later rerun.
+video_result = None
+future = st.session_state.video_future
+if future is not None and future.done():
+    st.session_state.video_future = None
+    try:
+        video_result = (future.result(), None)
+    except Exception as e:
+        video_result = (None, e)
 
 # Start job
 col_btn, col_help = st.columns([1, 3])
 with col_btn:
-    start_video = st.button("Generate Video", type="primary", use_container_width=True)
+    start_video = st.button("Generate Video", type="primary", use_container_width=True, disabled=st.session_state.video_future is not None)
 with col_help:
-    st.write("One video at a time. The app will create a job and poll until it completes.")
+    st.write("One video at a time. The job runs in the background, so you can keep chatting while it renders.")
 
 if start_video:
-    jobs_url = build_jobs_url_with_version(AZURE_OPENAI_ENDPOINT, video_api_version)
+    video_prompt_text = video_prompt.strip()
+    jobs_url = _jobs_url(cfg.endpoint, video_api_version)
     if not jobs_url:
         st.error("AZURE_OPENAI_ENDPOINT is missing. Set it to your base resource endpoint or the jobs endpoint.")
     elif not video_deployment:
         st.error("Please provide a video deployment name (e.g., sora).")
-    elif not video_prompt.strip():
+    elif not video_prompt_text:
         st.error("Please enter a prompt for your video.")
     else:
         headers = {
-            "api-key": AZURE_OPENAI_API_KEY or "",
+            "api-key": cfg.api_key,
             "Content-Type": "application/json",
             "Accept": "application/json",
         }
@@ -243,96 +587,49 @@ if start_video:
         # Use the exact API schema from your sample
         payload = {
             "model": video_deployment,
-            "prompt": video_prompt.strip(),
+            "prompt": video_prompt_text,
             "height": str(height),
             "width": str(width), 
             "n_seconds": str(duration_s),
             "n_variants": "1",
         }
 
-        def submit(url, payload):
-            return requests.post(url, json=payload, headers=headers, timeout=60)
+        base_endpoint = cfg.endpoint.split('/openai')[0] if '/openai' in cfg.endpoint else cfg.endpoint
+        progress = {"stage": "Queued…"}
+        st.session_state.video_progress = progress
+        st.session_state.video_future = get_executor().submit(
+            run_video_job, get_http_session(), jobs_url, payload, headers, base_endpoint, video_api_version, progress
+        )
+        st.rerun()
 
+if st.session_state.video_future is not None:
+    video_job_status()
+elif video_result is not None:
+    video_path, error = video_result
+    if error is None:
+        # Streamlit keeps its own copies for the player and download button; the temp
+        # file is deleted once they are registered, so nothing is left on disk
         try:
-            with st.status("Submitting video job…", expanded=False) as status:
-                resp = submit(jobs_url, payload)
-                if resp.status_code >= 400:
-                    st.error(f"Create job failed: {resp.status_code} {resp.text}")
-                    st.stop()
-                job = resp.json() or {}
-                job_id = job.get("id") or job.get("job_id") or job.get("data", {}).get("id")
-                if not job_id:
-                    st.error(f"Could not read job id from response: {job}")
-                    st.stop()
-                status.update(label="Job created. Polling for completion…", state="running")
-
-            # Poll for completion
-            status_url = build_status_url(jobs_url, job_id)
-            start_time = time.time()
-            video_url = None
-            last_msg = ""
-            while True:
-                time.sleep(3)
-                try:
-                    r = requests.get(status_url, headers=headers, timeout=30)
-                    content_type = r.headers.get("content-type", "")
-                    data = r.json() if content_type.startswith("application/json") else {}
-                except Exception as e:
-                    last_msg = f"Polling error: {e}"
-                    continue
-
-                # Read status/state
-                state = data.get("status") or data.get("state") or data.get("job_status")
-                
-                # Check if job has completed
-                if state in {"succeeded", "completed", "done"}:
-                    break
-                if state in {"failed", "error", "cancelled"}:
-                    st.error(f"Job ended with status: {state}. Details: {data}")
-                    st.stop()
-                # Timeout after 10 minutes
-                if time.time() - start_time > 600:
-                    st.error("Timed out waiting for the video job to complete.")
-                    st.stop()
-                with st.spinner("Generating…"):
-                    pass
-
-            # Fetch video content using the exact pattern from Azure OpenAI docs
-            generations = data.get("generations", [])
-            if not generations or not generations[0].get("id"):
-                st.error("Job completed but no generation ID was provided.")
-                with st.expander("🔍 Debug: Final job response", expanded=True):
-                    st.json(data)
-                st.stop()
-            
-            generation_id = generations[0]["id"]
-            st.write(f"✅ Video generation succeeded. Generation ID: {generation_id}")
-            
-            # Build the correct video content URL (from Azure OpenAI sample)
-            base_endpoint = AZURE_OPENAI_ENDPOINT.split('/openai')[0] if '/openai' in AZURE_OPENAI_ENDPOINT else AZURE_OPENAI_ENDPOINT
-            video_content_url = f"{base_endpoint}/openai/v1/video/generations/{generation_id}/content/video?api-version={video_api_version}"
-            
-            try:
-                st.write(f"📥 Downloading video from: {video_content_url}")
-                v = requests.get(video_content_url, headers=headers, timeout=120)
-                v.raise_for_status()
-                video_bytes = v.content
-                st.write(f"✅ Downloaded {len(video_bytes)} bytes")
-            except Exception as e:
-                st.error(f"Failed to download video: {e}")
-                st.write(f"❌ URL attempted: {video_content_url}")
-                with st.expander("🔍 Debug: Final job response", expanded=True):
-                    st.json(data)
-                st.stop()
-
+            st.write(f"✅ Downloaded {os.path.getsize(video_path)} bytes")
             st.success("Video generated!")
-            st.video(video_bytes)
-            st.download_button(
-                label="Download MP4",
-                data=video_bytes,
-                file_name="generated_video.mp4",
-                mime="video/mp4",
-                use_container_width=True,
-            )
-        except Exception as e:
-            st.error(f"Unexpected error: {e}")
+            st.caption("The video is shown until your next interaction with the page; download it to keep it.")
+            st.video(video_path)
+            # on_click="ignore" keeps the download from triggering a rerun that would clear the video
+            with open(video_path, "rb") as f:
+                st.download_button(
+                    label="Download MP4",
+                    data=f,
+                    file_name="generated_video.mp4",
+                    mime="video/mp4",
+                    on_click="ignore",
+                    use_container_width=True,
+                )
+        finally:
+            os.remove(video_path)
+    elif isinstance(error, VideoJobError):
+        st.error(str(error))
+        if error.details:
+            with st.expander("🔍 Debug: Final job response", expanded=True):
+                st.json(error.details)
+    else:
+        st.error(f"Unexpected error: {error}")
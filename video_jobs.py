@@ -0,0 +1,122 @@
+import os
+import random
+import tempfile
+import time
+from urllib.parse import urlparse, urlunparse
+
+import orjson
+
+# Video job helpers live in their own module so VideoJobError keeps one class identity
+# across Streamlit reruns (the app script is re-executed in a fresh namespace each run)
+
+# Quoted terminal job statuses, scanned for in raw polling responses before parsing
+TERMINAL_STATUS_MARKERS = (b'"succeeded"', b'"completed"', b'"done"', b'"failed"', b'"error"', b'"cancelled"')
+
+# Helper to build the status URL from the create URL and job_id
+def build_status_url(create_url: str, job_id: str) -> str:
+    if not create_url:
+        return ""
+    parsed = urlparse(create_url)
+    # Replace trailing /jobs with /jobs/{id}; preserve query
+    path = parsed.path
+    if path.endswith("/jobs"):
+        path = f"{path}/{job_id}"
+    elif "/jobs?" in create_url or path.endswith("/jobs/"):
+        # Fallback if already has query right after jobs
+        path = path.rstrip("/") + f"/{job_id}"
+    # Rebuild URL with same query
+    new_url = urlunparse((parsed.scheme, parsed.netloc, path, parsed.params, parsed.query, parsed.fragment))
+    return new_url
+
+# Raised by run_video_job; carries the last job response for the debug expander
+class VideoJobError(Exception):
+    def __init__(self, message: str, details=None):
+        super().__init__(message)
+        self.details = details
+
+# Helper: create a video job, poll it to completion and download the MP4. Runs on a
+# worker thread, so it reports through the `progress` dict instead of calling Streamlit.
+def run_video_job(session, jobs_url, payload, headers, base_endpoint, api_version, progress: dict) -> str:
+    progress["stage"] = "Submitting video job…"
+    resp = session.post(jobs_url, data=orjson.dumps(payload), headers=headers, timeout=60)
+    if resp.status_code >= 400:
+        raise VideoJobError(f"Create job failed: {resp.status_code} {resp.text}")
+    job = orjson.loads(resp.content) or {}
+    job_id = job.get("id") or job.get("job_id") or job.get("data", {}).get("id")
+    if not job_id:
+        raise VideoJobError(f"Could not read job id from response: {job}")
+    progress["stage"] = "Job created. Polling for completion…"
+
+    # Poll for completion (reusing the pooled session)
+    status_url = build_status_url(jobs_url, job_id)
+    start_time = time.time()
+    # Exponential backoff with jitter: short jobs are noticed quickly, long
+    # jobs aren't polled at a fixed cadence that invites 429s
+    delay = 1.0
+    etag = None
+    while True:
+        time.sleep(delay + random.uniform(0, 0.25))
+        delay = min(delay * 1.6, 15.0)
+        # Timeout after 10 minutes
+        if time.time() - start_time > 600:
+            raise VideoJobError("Timed out waiting for the video job to complete.")
+        try:
+            # Conditional GET: an unchanged job answers 304 with no body to parse
+            poll_headers = {**headers, "If-None-Match": etag} if etag else headers
+            r = session.get(status_url, headers=poll_headers, timeout=30)
+            if r.status_code == 304:
+                continue
+            etag = r.headers.get("ETag")
+            content_type = r.headers.get("content-type", "")
+            # Only decode JSON once the body can contain a terminal status or an
+            # eta_seconds hint; other queued/running polls are skipped with a cheap byte scan
+            needs_parse = b'"eta_seconds"' in r.content or any(marker in r.content for marker in TERMINAL_STATUS_MARKERS)
+            data = orjson.loads(r.content) if needs_parse and content_type.startswith("application/json") else {}
+        except Exception as e:
+            progress["stage"] = f"Polling error: {e}"
+            continue
+
+        # Honor server pacing hints when present
+        try:
+            if r.headers.get("Retry-After"):
+                delay = max(delay, float(r.headers["Retry-After"]))
+            if data.get("eta_seconds"):
+                delay = max(delay, min(float(data["eta_seconds"]) / 2, 15.0))
+        except (TypeError, ValueError):
+            pass
+
+        # Read status/state
+        state = data.get("status") or data.get("state") or data.get("job_status")
+
+        # Check if job has completed
+        if state in {"succeeded", "completed", "done"}:
+            break
+        if state in {"failed", "error", "cancelled"}:
+            raise VideoJobError(f"Job ended with status: {state}. Details: {data}")
+        progress["stage"] = f"Generating… ({int(time.time() - start_time)}s)"
+
+    # Fetch video content using the exact pattern from Azure OpenAI docs
+    generations = data.get("generations", [])
+    if not generations or not generations[0].get("id"):
+        raise VideoJobError("Job completed but no generation ID was provided.", data)
+
+    generation_id = generations[0]["id"]
+
+    # Build the correct video content URL (from Azure OpenAI sample)
+    video_content_url = f"{base_endpoint}/openai/v1/video/generations/{generation_id}/content/video?api-version={api_version}"
+    progress["stage"] = f"📥 Generation {generation_id} succeeded. Downloading video from: {video_content_url}"
+
+    # Stream in 1 MiB chunks to a temp file, so the download shows progress and the
+    # worker holds no copy in memory; the caller renders from the path and deletes it
+    out = tempfile.NamedTemporaryFile(suffix=".mp4", delete=False)
+    try:
+        with out, session.get(video_content_url, headers=headers, stream=True, timeout=(10, 300)) as v:
+            v.raise_for_status()
+            progress["total"] = int(v.headers.get("content-length", 0))
+            for chunk in v.iter_content(chunk_size=1 << 20):
+                out.write(chunk)
+                progress["done"] = progress.get("done", 0) + len(chunk)
+    except Exception as e:
+        os.remove(out.name)
+        raise VideoJobError(f"Failed to download video: {e} (URL attempted: {video_content_url})", data) from e
+    return out.name